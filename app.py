@@ -1,9 +1,24 @@
 import sqlite3
 from flask import Flask, render_template, request, redirect, url_for, session, flash, g, Response
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from werkzeug.datastructures import CallbackDict
+from werkzeug.security import check_password_hash
+from flask_caching import Cache
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+import bcrypt
+import redis
+# Aliased so handlers can keep using `date` for the submitted booking date
+from datetime import date as _date, timedelta
+from functools import lru_cache
 import os
+import pathlib
 import io
+import copy
+import hashlib
+import queue
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from fpdf import FPDF
 import openpyxl
 
@@ -13,22 +28,200 @@ app = Flask(__name__)
 # It's crucial to set a secret key for session management.
 # In a production environment, use a more complex, securely stored key.
 app.config['SECRET_KEY'] = 'a_very_secret_and_secure_key_for_turf_booking'
-DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database/turf_booking.db')
+# bcrypt work factor; raise it as far as login latency on the target hardware allows.
+app.config['BCRYPT_ROUNDS'] = 10
+# Resolved once at import; connections open the URI form so SQLite skips re-normalizing the path.
+DATABASE = str(pathlib.Path(__file__).resolve().parent / 'database' / 'turf_booking.db')
+DB_URI = pathlib.Path(DATABASE).as_uri() + '?mode=rwc'
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
+# Signs the booking details carried from the confirmation page to execute_booking.
+# Tokens expire so a confirmed price and points redemption cannot be reused indefinitely.
+app.config['BOOKING_TOKEN_MAX_AGE'] = 600  # seconds
+booking_serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='booking')
+
+# --- SESSION STORAGE ---
+_MISSING = object()
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session data held in Redis; the cookie only carries the session id."""
+
+    def __init__(self, initial=None, sid=None, version=0, new=False):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.version = version
+        self.new = new
+        # Deep copy so in-place changes to mutable values (e.g. the _flashes list) show up as changes
+        self.initial = copy.deepcopy(dict(initial or {}))
+        self.modified = False
+        self.previous_sid = None
+
+    def regenerate(self):
+        """Moves the session to a fresh id; the old one is deleted when the session is saved."""
+        if self.previous_sid is None and not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.version = 0
+        self.new = True
+        self.modified = True
+
+class SessionConflictError(RuntimeError):
+    """Raised when a session cannot be saved without losing a concurrent update."""
+
+class RedisSessionInterface(SessionInterface):
+    """Stores sessions in Redis hashes of {data, ver} and saves them optimistically.
+
+    If another request saved the same session since this one loaded it, the keys
+    this request changed are re-applied on top of the newer data as long as the
+    other request left them alone. If both requests changed the same key,
+    SessionConflictError is raised instead of letting one write silently win.
+    """
+    serializer = TaggedJSONSerializer()
+    max_retries = 5
+
+    def __init__(self, client, prefix='session:'):
+        self.client = client
+        self.prefix = prefix
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            stored = self.client.hmget(self.prefix + sid, 'data', 'ver')
+            if stored[0] is not None:
+                return ServerSideSession(self.serializer.loads(stored[0]), sid=sid, version=int(stored[1]))
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        key = self.prefix + session.sid
+
+        if session.previous_sid is not None:
+            self.client.delete(self.prefix + session.previous_sid)
+
+        if not session.modified:
+            return
+
+        changed = {k: v for k, v in session.items() if k not in session.initial or session.initial[k] != v}
+        removed = [k for k in session.initial if k not in session]
+        ttl = int(app.permanent_session_lifetime.total_seconds())
+
+        for _ in range(self.max_retries):
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    stored = pipe.hmget(key, 'data', 'ver')
+                    current_version = int(stored[1] or 0)
+                    if current_version == session.version:
+                        data = dict(session)
+                    else:
+                        # Lost the race: merge our changes into the newer copy, unless
+                        # the other writer changed one of the same keys.
+                        data = self.serializer.loads(stored[0]) if stored[0] is not None else {}
+                        for k in list(changed) + removed:
+                            if data.get(k, _MISSING) != session.initial.get(k, _MISSING):
+                                raise SessionConflictError(f'Session key {k!r} was changed by a concurrent request')
+                        data.update(changed)
+                        for k in removed:
+                            data.pop(k, None)
+                    pipe.multi()
+                    if data:
+                        pipe.hset(key, mapping={'data': self.serializer.dumps(data), 'ver': current_version + 1})
+                        pipe.expire(key, ttl)
+                    else:
+                        pipe.delete(key)
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue
+        else:
+            raise SessionConflictError(f'Could not save session after {self.max_retries} concurrent updates')
+
+        if not data:
+            response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+def _reset_session():
+    """Clears the session and, for server-side sessions, issues a new session id.
+
+    Rotating the id at login and logout prevents session fixation.
+    """
+    session.clear()
+    regenerate = getattr(session, 'regenerate', None)
+    if regenerate is not None:
+        regenerate()
+
+# Keep only a session id in the cookie when a Redis server is configured;
+# otherwise fall back to Flask's signed cookie sessions for local development.
+if os.environ.get('REDIS_URL'):
+    app.session_interface = RedisSessionInterface(redis.Redis.from_url(os.environ['REDIS_URL']))
 
 # --- DATABASE MANAGEMENT ---
+# Connections are reused across requests instead of being opened and closed each
+# time. The pool fills lazily so importing the app never creates the database file.
+_pool = queue.Queue(maxsize=10)
+
+def _connect():
+    """Opens a new pooled connection with the per-connection settings applied once."""
+    db = sqlite3.connect(DB_URI, uri=True, detect_types=0, check_same_thread=False)
+    db.row_factory = sqlite3.Row  # This allows accessing columns by name
+    db.execute('PRAGMA cache_size=-8000')  # ~8 MB page cache per connection
+    # WAL lets availability checks read while bookings are being written.
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA busy_timeout=5000')
+    _ensure_indexes(db)
+    return db
+
+def _ensure_indexes(db):
+    """Creates the booking indexes on databases initialized before they were added to schema.sql."""
+    has_bookings = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookings'"
+    ).fetchone()
+    if has_bookings is None:
+        return  # Not initialized yet; init_db creates the indexes from schema.sql
+    try:
+        db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_bookings_slot ON bookings (turf_id, booking_time) WHERE status = 'Confirmed'"
+        )
+    except sqlite3.IntegrityError:
+        # Existing duplicate confirmed bookings; execute_booking's NOT EXISTS check still applies
+        app.logger.warning('Could not create ux_bookings_slot: duplicate confirmed bookings exist')
+    db.execute('CREATE INDEX IF NOT EXISTS ix_bookings_slot_lookup ON bookings (turf_id, booking_time, status)')
+    db.execute('CREATE INDEX IF NOT EXISTS ix_bookings_user_time ON bookings (user_id, booking_time DESC)')
+    db.commit()
+
 def get_db():
-    """Opens a new database connection if there is none yet for the current application context."""
+    """Checks a connection out of the pool if there is none yet for the current application context."""
     if 'db' not in g:
-        g.db = sqlite3.connect(DATABASE)
-        g.db.row_factory = sqlite3.Row  # This allows accessing columns by name
+        try:
+            g.db = _pool.get_nowait()
+        except queue.Empty:
+            g.db = _connect()
     return g.db
 
 @app.teardown_appcontext
 def close_db(exception):
-    """Closes the database again at the end of the request."""
+    """Returns the connection to the pool at the end of the request."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        db.rollback()  # Never hand out a connection with a half-finished transaction
+        try:
+            _pool.put_nowait(db)
+        except queue.Full:
+            db.close()
 
 def init_db():
     """Initializes the database using the schema.sql file."""
@@ -44,14 +237,99 @@ def initdb_command():
     init_db()
     print('Initialized the database.')
 
+# --- CACHED QUERIES ---
+# Turfs only change through the admin routes, which invalidate these helpers.
+# Rows are stored as plain dicts because sqlite3.Row objects cannot be pickled.
+@cache.memoize(60)
+def _all_turfs():
+    return [dict(turf) for turf in get_db().execute('SELECT * FROM turfs').fetchall()]
+
+@cache.memoize(60)
+def _turfs_by_name():
+    return [dict(turf) for turf in get_db().execute('SELECT * FROM turfs ORDER BY name').fetchall()]
+
+def _invalidate_turfs():
+    cache.delete_memoized(_all_turfs)
+    cache.delete_memoized(_turfs_by_name)
+
+@cache.memoize(30)
+def _booked_slots(turf_id, ordinal):
+    """Maps each of the 7 bookable dates starting at the given day ordinal to its booked times."""
+    dates = _dates_for(ordinal)
+    booked = {d: [] for d in dates}
+    rows = get_db().execute(
+        'SELECT booking_time FROM bookings WHERE turf_id = ? AND booking_time BETWEEN ? AND ? AND status = "Confirmed"',
+        (turf_id, f"{dates[0]} 00:00", f"{dates[-1]} 23:59")
+    )
+    for row in rows:
+        # Skip malformed times that merely sort inside the window
+        booking_date, _, booking_time = str(row[0]).partition(' ')
+        if booking_date in booked:
+            booked[booking_date].append(booking_time)
+    return booked
+
+def _invalidate_availability(turf_id):
+    cache.delete_memoized(_booked_slots, turf_id, _date.today().toordinal())
+
 # --- MIDDLEWARE & HELPERS ---
+# bcrypt is deliberately slow; hashing runs on a small dedicated pool so at most
+# four hashes are computed at once. The calling request still waits for its result.
+_hash_pool = ThreadPoolExecutor(max_workers=4)
+
+def _hash_password(password):
+    """Hashes a plaintext password with bcrypt on the hashing pool."""
+    salt = bcrypt.gensalt(rounds=app.config['BCRYPT_ROUNDS'])
+    return _hash_pool.submit(bcrypt.hashpw, password.encode(), salt).result()
+
+# bcrypt only accepts passwords up to this many bytes
+MAX_PASSWORD_BYTES = 72
+
+def _is_bcrypt_hash(password_hash):
+    return isinstance(password_hash, bytes) and password_hash.startswith(b'$2')
+
+def _check_password(password, password_hash):
+    """Checks a plaintext password against a bcrypt hash on the hashing pool.
+
+    Hashes created by werkzeug before the switch to bcrypt are still accepted, so
+    existing accounts can log in and be re-hashed.
+    """
+    if len(password.encode()) > MAX_PASSWORD_BYTES:
+        return False
+    if not _is_bcrypt_hash(password_hash):
+        return check_password_hash(password_hash, password)
+    return _hash_pool.submit(bcrypt.checkpw, password.encode(), password_hash).result()
+
+# Checked against when the username does not exist, so unknown users take as long
+# to reject as wrong passwords and login timing does not reveal which accounts exist.
+# Built per work factor so it follows BCRYPT_ROUNDS even if that is changed after import.
+@lru_cache(maxsize=None)
+def _dummy_hash(rounds):
+    return bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=rounds))
+
+# Prebuilt /check_availability response bodies
+_AVAILABLE_JSON = b'{"available": true}'
+_UNAVAILABLE_JSON = b'{"available": false}'
+
+# Bookable time slots, from 9 AM to 9 PM (21:00)
+TIME_SLOTS = tuple(f"{h:02d}:00" for h in range(9, 22))
+
+@lru_cache(maxsize=1)
+def _dates_for(ordinal):
+    """Returns the next 7 bookable dates starting from the given day ordinal."""
+    start = _date.fromordinal(ordinal)
+    return tuple((start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7))
+
 @app.before_request
 def before_request():
     """Pre-request logic to manage user sessions."""
     g.user = None
     if 'user_id' in session:
         db = get_db()
-        user = db.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],)).fetchone()
+        # Only load the columns handlers and templates need; never the password hash.
+        user = db.execute(
+            'SELECT id, username, is_admin, loyalty_points FROM users WHERE id = ?',
+            (session['user_id'],)
+        ).fetchone()
         g.user = user
 
 # --- AUTHENTICATION ROUTES ---
@@ -69,13 +347,15 @@ def register():
             error = 'Username is required.'
         elif not password:
             error = 'Password is required.'
+        elif len(password.encode()) > MAX_PASSWORD_BYTES:
+            error = f'Password must be at most {MAX_PASSWORD_BYTES} bytes long.'
         elif db.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone() is not None:
             error = f"User {username} is already registered."
 
         if error is None:
             db.execute(
                 'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
-                (username, email, generate_password_hash(password))
+                (username, email, _hash_password(password))
             )
             db.commit()
             flash('Registration successful! Please log in.', 'success')
@@ -94,13 +374,17 @@ def login():
         error = None
         user = db.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
 
-        if user is None:
-            error = 'Incorrect username.'
-        elif not check_password_hash(user['password_hash'], password):
-            error = 'Incorrect password.'
+        # Always run a hash check and report one message for both failure cases.
+        password_hash = user['password_hash'] if user is not None else _dummy_hash(app.config['BCRYPT_ROUNDS'])
+        if not _check_password(password, password_hash) or user is None:
+            error = 'Incorrect credentials.'
 
         if error is None:
-            session.clear()
+            if not _is_bcrypt_hash(user['password_hash']):
+                # Upgrade a legacy werkzeug hash now that we have the plaintext
+                db.execute('UPDATE users SET password_hash = ? WHERE id = ?', (_hash_password(password), user['id']))
+                db.commit()
+            _reset_session()
             session['user_id'] = user['id']
             if user['is_admin']:
                 return redirect(url_for('admin_dashboard'))
@@ -112,7 +396,7 @@ def login():
 
 @app.route('/logout')
 def logout():
-    session.clear()
+    _reset_session()
     flash('You have been logged out.', 'info')
     return redirect(url_for('login'))
 
@@ -122,9 +406,7 @@ def index():
     if g.user is None:
         return redirect(url_for('login'))
     
-    db = get_db()
-    turfs = db.execute('SELECT * FROM turfs').fetchall()
-    return render_template('index.html', turfs=turfs)
+    return render_template('index.html', turfs=_all_turfs())
 
 @app.route('/turf/<int:turf_id>')
 def turf_details(turf_id):
@@ -134,14 +416,10 @@ def turf_details(turf_id):
     db = get_db()
     turf = db.execute('SELECT * FROM turfs WHERE id = ?', (turf_id,)).fetchone()
     
-    # Generate next 7 days for booking
-    today = datetime.now()
-    dates = [(today + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
-    
-    # Generate time slots (e.g., from 9 AM to 9 PM)
-    time_slots = [f"{h:02d}:00" for h in range(9, 22)] # 9 AM to 9 PM (21:00)
+    # Next 7 days for booking; recomputed only when the day changes
+    dates = _dates_for(_date.today().toordinal())
 
-    return render_template('turf_details.html', turf=turf, dates=dates, time_slots=time_slots)
+    return render_template('turf_details.html', turf=turf, dates=dates, time_slots=TIME_SLOTS)
 
 @app.route('/check_availability')
 def check_availability():
@@ -152,12 +430,20 @@ def check_availability():
     booking_datetime_str = f"{date} {time}"
     
     db = get_db()
-    booking = db.execute(
-        'SELECT id FROM bookings WHERE turf_id = ? AND booking_time = ? AND status = "Confirmed"',
+    # EXISTS stops at the first matching booking instead of returning its row.
+    taken = db.execute(
+        'SELECT EXISTS (SELECT 1 FROM bookings WHERE turf_id = ? AND booking_time = ? AND status = "Confirmed")',
         (turf_id, booking_datetime_str)
-    ).fetchone()
+    ).fetchone()[0]
     
-    return {'available': booking is None}
+    # The response is one of two fixed bodies, so skip JSON serialization entirely.
+    return Response(_UNAVAILABLE_JSON if taken else _AVAILABLE_JSON, mimetype='application/json')
+
+@app.route('/availability')
+def availability():
+    """API endpoint returning the booked slots of a turf for the whole 7-day booking window."""
+    turf_id = request.args.get('turf_id', type=int)
+    return {'booked': _booked_slots(turf_id, _date.today().toordinal())}
 
 # --- BOOKING WORKFLOW ---
 @app.route('/book/confirm', methods=['POST'])
@@ -174,13 +460,31 @@ def confirm_booking():
     if not all([turf_id, date, time]):
         flash('Missing booking information. Please select a date and time.', 'error')
         return redirect(request.referrer or url_for('index'))
+
+    # Only slots offered on the turf page can be signed into a booking token
+    if date not in _dates_for(_date.today().toordinal()) or time not in TIME_SLOTS:
+        flash('Please select a date and time from the available slots.', 'error')
+        return redirect(request.referrer or url_for('index'))
     
     db = get_db()
-    turf = db.execute('SELECT * FROM turfs WHERE id = ?', (turf_id,)).fetchone()
+    # Fetch the turf and whether the slot is already taken in a single round-trip.
+    turf = db.execute(
+        '''
+        WITH t AS (SELECT * FROM turfs WHERE id = ?)
+        SELECT t.*, EXISTS (
+            SELECT 1 FROM bookings WHERE turf_id = t.id AND booking_time = ? AND status = "Confirmed"
+        ) AS taken
+        FROM t
+        ''', (turf_id, f"{date} {time}")
+    ).fetchone()
     if turf is None:
         flash('Selected turf not found.', 'error')
         return redirect(url_for('index'))
 
+    if turf['taken']:
+        flash('Sorry, this slot is already booked. Please select a different time.', 'error')
+        return redirect(url_for('turf_details', turf_id=turf_id))
+
     amount = turf['price_per_hour']
     points_to_redeem = 0
     discount = 0.0
@@ -199,7 +503,20 @@ def confirm_booking():
         "points_to_redeem": points_to_redeem
     }
 
-    return render_template('payment_confirmation.html', turf=turf, booking_details=booking_details)
+    # The priced booking is signed so execute_booking can trust it without
+    # re-reading the turf, and the client cannot tamper with the amount.
+    token = booking_serializer.dumps({
+        "user_id": g.user['id'],
+        "turf_id": turf['id'],
+        "turf_name": turf['name'],
+        "price": turf['price_per_hour'],
+        "date": date,
+        "time": time,
+        "final": final_amount,
+        "points": points_to_redeem
+    })
+
+    return render_template('payment_confirmation.html', turf=turf, booking_details=booking_details, token=token)
 
 @app.route('/book/execute', methods=['POST'])
 def execute_booking():
@@ -207,42 +524,62 @@ def execute_booking():
     if g.user is None:
         return redirect(url_for('login'))
 
+    try:
+        booking = booking_serializer.loads(request.form.get('token', ''), max_age=app.config['BOOKING_TOKEN_MAX_AGE'])
+    except SignatureExpired:
+        flash('Your booking confirmation has expired. Please select the slot again.', 'error')
+        return redirect(url_for('index'))
+    except BadSignature:
+        booking = None
+    if booking is None or booking['user_id'] != g.user['id']:
+        flash('Invalid booking request. Please try again.', 'error')
+        return redirect(url_for('index'))
+
     db = get_db()
-    turf_id = request.form.get('turf_id')
-    date = request.form.get('date')
-    time = request.form.get('time')
-    final_amount = float(request.form.get('final_amount'))
-    points_redeemed = int(request.form.get('points_redeemed'))
+    turf_id = booking['turf_id']
+    date = booking['date']
+    time = booking['time']
+    final_amount = booking['final']
+    points_redeemed = booking['points']
 
     booking_datetime = f"{date} {time}"
 
-    # Final check: Ensure the slot has not been booked by someone else
-    # while the user was on the confirmation page. This prevents duplicate bookings.
-    existing_booking = db.execute(
-        'SELECT id FROM bookings WHERE turf_id = ? AND booking_time = ? AND status = "Confirmed"',
-        (turf_id, booking_datetime)
-    ).fetchone()
+    # Claim the slot atomically: the insert only happens if no confirmed booking
+    # exists for it, so two users racing for the same slot cannot both succeed.
+    db.execute('BEGIN IMMEDIATE')
+    cur = db.execute(
+        '''
+        INSERT OR IGNORE INTO bookings (user_id, turf_id, booking_time, amount_paid, points_redeemed)
+        SELECT ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (
+            SELECT 1 FROM bookings WHERE turf_id = ? AND booking_time = ? AND status = "Confirmed"
+        )
+        ''',
+        (g.user['id'], turf_id, booking_datetime, final_amount, points_redeemed, turf_id, booking_datetime)
+    )
 
-    if existing_booking:
+    if cur.rowcount == 0:
+        db.rollback()
         flash('Sorry, this slot was just booked by another user. Please select a different time.', 'error')
         return redirect(url_for('turf_details', turf_id=turf_id))
 
-    turf = db.execute('SELECT * FROM turfs WHERE id = ?', (turf_id,)).fetchone()
-
-    # Update user's points
-    current_points = g.user['loyalty_points']
-    new_points = (current_points - points_redeemed) + 10
-    
-    # Insert booking
-    db.execute(
-        'INSERT INTO bookings (user_id, turf_id, booking_time, amount_paid, points_redeemed) VALUES (?, ?, ?, ?, ?)',
-        (g.user['id'], turf_id, booking_datetime, final_amount, points_redeemed)
+    # Update user's points balance in SQL so concurrent bookings by the same user
+    # cannot overwrite each other with a stale value or redeem points they no
+    # longer have, then commit both writes together.
+    cur = db.execute(
+        'UPDATE users SET loyalty_points = loyalty_points - ? + 10 WHERE id = ? AND loyalty_points >= ?',
+        (points_redeemed, g.user['id'], points_redeemed)
     )
-    
-    # Update user's points balance
-    db.execute('UPDATE users SET loyalty_points = ? WHERE id = ?', (new_points, g.user['id']))
-    
+
+    if cur.rowcount == 0:
+        db.rollback()
+        flash('You no longer have enough loyalty points for this discount. Please try again.', 'error')
+        return redirect(url_for('turf_details', turf_id=turf_id))
+
     db.commit()
+    _invalidate_availability(turf_id)
+
+    turf = {"name": booking['turf_name'], "price_per_hour": booking['price']}
 
     flash('Booking successful! You have earned 10 loyalty points.', 'success')
     return render_template('booking_confirmation.html', turf=turf, date=date, time=time, amount=final_amount, discount=(turf['price_per_hour'] - final_amount))
@@ -271,21 +608,25 @@ def cancel_booking(booking_id):
         return redirect(url_for('login'))
 
     db = get_db()
-    booking = db.execute('SELECT * FROM bookings WHERE id = ? AND user_id = ?', (booking_id, g.user['id'])).fetchone()
-    
-    if booking:
-        db.execute('UPDATE bookings SET status = "Cancelled" WHERE id = ?', (booking_id,))
-        
-        # Logic to return/remove points
-        points_change = 0
-        if booking['points_redeemed'] > 0:
-            points_change += booking['points_redeemed'] # Return redeemed points
-        points_change -= 10 # Remove awarded points
-        
-        if points_change != 0:
-             db.execute('UPDATE users SET loyalty_points = loyalty_points + ? WHERE id = ?', (points_change, g.user['id']))
+    # Cancel and read back the redeemed points in one statement; only confirmed
+    # bookings match, so a booking cannot be cancelled (and refunded) twice.
+    with db:
+        booking = db.execute(
+            '''
+            UPDATE bookings SET status = "Cancelled"
+            WHERE id = ? AND user_id = ? AND status = "Confirmed"
+            RETURNING turf_id, points_redeemed
+            ''', (booking_id, g.user['id'])
+        ).fetchone()
+
+        if booking:
+            # Return redeemed points and remove the 10 awarded points
+            points_change = (booking['points_redeemed'] or 0) - 10
+            if points_change != 0:
+                db.execute('UPDATE users SET loyalty_points = loyalty_points + ? WHERE id = ?', (points_change, g.user['id']))
 
-        db.commit()
+    if booking:
+        _invalidate_availability(booking['turf_id'])
         flash('Booking has been cancelled.', 'success')
     else:
         flash('Booking not found or you do not have permission to cancel it.', 'error')
@@ -311,8 +652,7 @@ def admin_dashboard():
         '''
     ).fetchall()
     
-    turfs = db.execute('SELECT * FROM turfs ORDER BY name').fetchall()
-    return render_template('admin_dashboard.html', bookings=all_bookings, turfs=turfs)
+    return render_template('admin_dashboard.html', bookings=all_bookings, turfs=_turfs_by_name())
 
 @app.route('/admin/turf/add', methods=['POST'])
 def add_turf():
@@ -331,6 +671,7 @@ def add_turf():
         (name, location, description, price, image_url)
     )
     db.commit()
+    _invalidate_turfs()
     flash(f'Turf "{name}" added successfully.', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -345,6 +686,7 @@ def remove_turf(turf_id):
     # Then, delete the turf itself
     db.execute('DELETE FROM turfs WHERE id = ?', (turf_id,))
     db.commit()
+    _invalidate_turfs()
     flash(f'Turf and all its associated bookings have been removed.', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -365,6 +707,25 @@ def download_pdf_report():
         return redirect(url_for('index'))
     
     db = get_db()
+    # Reuse the rendered PDF until the bookings change: the key moves whenever a
+    # booking is added, cancelled, or removed along with its turf.
+    fingerprint = db.execute(
+        'SELECT COUNT(*), MAX(id), MAX(booking_time), SUM(status = "Cancelled") FROM bookings'
+    ).fetchone()
+    cache_key = 'pdf_report:' + hashlib.blake2b(repr(tuple(fingerprint)).encode()).hexdigest()
+    pdf_bytes = cache.get(cache_key)
+    if pdf_bytes is None:
+        pdf_bytes = _render_pdf_report(db)
+        cache.set(cache_key, pdf_bytes, timeout=300)
+
+    return Response(pdf_bytes,
+                    mimetype='application/pdf',
+                    headers={'Content-Disposition':'attachment;filename=booking_report.pdf'})
+
+def _render_pdf_report(db):
+    """Renders the full bookings report and returns the PDF as bytes."""
+    # Iterate the cursor directly so rows are decoded one at a time instead of
+    # materializing the whole bookings table in memory.
     bookings = db.execute(
         '''
         SELECT u.username, t.name, b.booking_time, b.status, b.amount_paid
@@ -373,7 +734,7 @@ def download_pdf_report():
         JOIN turfs t ON b.turf_id = t.id
         ORDER BY b.booking_time DESC
         '''
-    ).fetchall()
+    )
     
     pdf = PDF()
     pdf.add_page()
@@ -388,23 +749,30 @@ def download_pdf_report():
     pdf.ln()
     
     # Table Rows
+    # This loop dominates large reports: bind the methods once and read columns by
+    # position (username, name, booking_time, status, amount_paid) rather than by name.
+    # booking_time has NUMERIC affinity and can come back as a number, so keep str().
     pdf.set_font('Arial', '', 10)
+    cell = pdf.cell
+    ln = pdf.ln
     for booking in bookings:
-        pdf.cell(40, 10, str(booking['username']), 1)
-        pdf.cell(50, 10, str(booking['name']), 1)
-        pdf.cell(50, 10, str(booking['booking_time']), 1)
-        pdf.cell(20, 10, str(booking['status']), 1)
-        pdf.cell(30, 10, f"Rs.{booking['amount_paid']:.2f}", 1)
-        pdf.ln()
+        cell(40, 10, str(booking[0]), 1)
+        cell(50, 10, str(booking[1]), 1)
+        cell(50, 10, str(booking[2]), 1)
+        cell(20, 10, str(booking[3]), 1)
+        cell(30, 10, f"Rs.{booking[4]:.2f}", 1)
+        ln()
         
-    return Response(pdf.output(dest='S'),
-                    mimetype='application/pdf',
-                    headers={'Content-Disposition':'attachment;filename=booking_report.pdf'})
+    return bytes(pdf.output())
 
 @app.route('/admin/report/excel')
 def download_excel_report():
     if not g.user or not g.user['is_admin']:
         return redirect(url_for('index'))
+
+    # Optional paging for very large exports; a negative LIMIT means "no limit" in SQLite.
+    limit = request.args.get('limit', -1, type=int)
+    offset = request.args.get('offset', 0, type=int)
         
     db = get_db()
     bookings = db.execute(
@@ -414,12 +782,13 @@ def download_excel_report():
         JOIN users u ON b.user_id = u.id
         JOIN turfs t ON b.turf_id = t.id
         ORDER BY b.booking_time DESC
-        '''
-    ).fetchall()
+        LIMIT ? OFFSET ?
+        ''', (limit, offset)
+    )
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Bookings Report"
+    # Write-only mode streams rows into the workbook instead of keeping every cell in memory
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Bookings Report")
     
     # Header
     ws.append(['Username', 'Turf Name', 'Booking Time', 'Status', 'Amount Paid (Rs)'])
@@ -437,9 +806,8 @@ def download_excel_report():
     # Save to a memory buffer
     buffer = io.BytesIO()
     wb.save(buffer)
-    buffer.seek(0)
     
-    return Response(buffer,
+    return Response(buffer.getvalue(),
                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
                     headers={'Content-Disposition':'attachment;filename=booking_report.xlsx'})
 
@@ -8,7 +8,7 @@ CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT UNIQUE NOT NULL,
     email TEXT UNIQUE NOT NULL,
-    password_hash TEXT NOT NULL,
+    password_hash BLOB NOT NULL, -- bcrypt hash bytes
     is_admin BOOLEAN NOT NULL DEFAULT 0, -- 0 for User, 1 for Admin
     loyalty_points INTEGER NOT NULL DEFAULT 0
 );
@@ -37,10 +37,17 @@ CREATE TABLE bookings (
     FOREIGN KEY (turf_id) REFERENCES turfs (id)
 );
 
+-- A slot can only hold one confirmed booking at a time; cancelled rows are ignored
+CREATE UNIQUE INDEX ux_bookings_slot ON bookings (turf_id, booking_time) WHERE status = 'Confirmed';
+
+-- Indexes for the hot booking lookups: slot availability checks and per-user history
+CREATE INDEX ix_bookings_slot_lookup ON bookings (turf_id, booking_time, status);
+CREATE INDEX ix_bookings_user_time ON bookings (user_id, booking_time DESC);
+
 -- Insert a default admin user for initial setup
 -- Password is 'admin'
 INSERT INTO users (username, email, password_hash, is_admin) VALUES
-('admin', 'admin@turf.com', 'scrypt:32768:8:1$va0oe3GPcgV3Dr1l$f5eca15f7123ecb7031c70e05e0bbc2c067db1a60354f9749c5c19b608740d38244c2c6ae4878f6d8492f976f8edbeeace002cec5ee079a4d12ef87a7b485091', 1);
+('admin', 'admin@turf.com', CAST('$2b$10$HJCdRSLd3jml8aJebQkSlO9UPfbF5uB2Q3bfMQJpKMEu2IjtCwmee' AS BLOB), 1);
 
 -- Insert some sample turfs for demonstration
 INSERT INTO turfs (name, location, description, price_per_hour) VALUES
@@ -49,3 +56,5 @@ INSERT INTO turfs (name, location, description, price_per_hour) VALUES
 ('Community Kickers', 'Westside Park', 'A friendly, well-maintained turf ideal for community games and practice sessions.', 1000.00),
 ('VIT Chennai', 'Vandalur - Kilampakkam Road', 'Large 5 Cricket Turf and 5 Football Turf', 2000.00);
 
+-- Refresh planner statistics so the indexes above are picked up
+ANALYZE;